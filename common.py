@@ -1,8 +1,40 @@
 
-import re
+from itertools import chain
 from sublime import Region
 
-RE_FILE = re.compile(r'^([^\\// ].*)$')
+# Characters a filename line cannot start with.
+_FORBIDDEN_FIRST = frozenset('\\/ ')
+
+def _name(text):
+    """
+    Returns the filename on a file line or None if the line does not contain one.
+    """
+    return text if text and text[0] not in _FORBIDDEN_FIRST else None
+
+# The loops used by DiredBaseCommand._mark, one for each kind of mark.  `marked` maps file indexes
+# to their line regions and is updated in place for the file `indexes`.
+
+def _mark_all_true(marked, indexes, lines, filenames):
+    for i in indexes:
+        if filenames[i] is not None:
+            marked[i] = lines[i]
+
+def _mark_all_false(marked, indexes):
+    pop = marked.pop
+    for i in indexes:
+        pop(i, None)
+
+def _mark_predicate(func, marked, indexes, lines, filenames):
+    pop = marked.pop
+    for i in indexes:
+        filename = filenames[i]
+        if filename is not None:
+            newmark = func(i in marked, filename)
+            assert newmark in (True, False), 'Invalid mark: {}'.format(newmark)
+            if newmark:
+                marked[i] = lines[i]
+            else:
+                pop(i, None)
 
 def first(seq, pred):
     # I can't comprehend how this isn't built-in.
@@ -12,6 +44,15 @@ class DiredBaseCommand:
     """
     Convenience functions for dired TextCommands
     """
+    # The ((view id, change count), file count, region) from the last fileregion call.  The view
+    # id is needed since DiredPreviewEventListener uses these methods with any view.
+    _fileregion_cache = None
+
+    # The ((view id, change count), marked regions, {file index: region}) from the last _mark
+    # call.  It is only reused while the view text and the 'marked' regions are unchanged since
+    # other commands (and refreshes) also replace the marks.
+    _marked_cache = None
+
     @property
     def path(self):
         return self.view.settings().get('dired_path')
@@ -32,20 +73,26 @@ class DiredBaseCommand:
         if files.empty():
             return
 
-        pt = self.view.sel()[0].a
+        view = self.view
+        sel = view.sel()
+        pt = sel[0].a
 
+        stepped = False
         if files.contains(pt):
             # Try moving by one line.
-            line = self.view.line(pt)
+            line = view.line(pt)
             pt = forward and (line.b + 1) or (line.a - 1)
+            stepped = True
 
-        if not files.contains(pt):
-            # Not (or no longer) in the list of files, so move to the closest edge.
-            pt = (pt > files.b) and files.b or files.a
+        # If not (or no longer) in the list of files, move to the closest edge.
+        clamped = min(max(pt, files.a), files.b)
 
-        line = self.view.line(pt)
-        self.view.sel().clear()
-        self.view.sel().add(Region(line.a, line.a))
+        # Stepping forward within the files already lands on the start of a line.
+        if not (stepped and forward and clamped == pt):
+            pt = view.line(clamped).a
+
+        sel.clear()
+        sel.add(Region(pt, pt))
 
 
     def fileregion(self):
@@ -54,38 +101,108 @@ class DiredBaseCommand:
         Region(0,0) is returned.
         """
         count = self.filecount()
+        stamp = (self.view.id(), self.view.change_count())
+        cache = self._fileregion_cache
+        if cache and cache[0] == stamp and cache[1] == count:
+            return cache[2]
+        region = self._compute_fileregion(count)
+        self._fileregion_cache = (stamp, count, region)
+        return region
+
+    def _compute_fileregion(self, count):
         if count == 0:
             return Region(0, 0)
         return Region(self.view.text_point(2, 0), self.view.text_point(count+2, 0)-1)
 
 
+    def _filenames(self, region):
+        """
+        Returns a list of the filenames on the lines of region, which should be the file region.
+        The filename is None for a line that does not contain one.
+
+        The refresh command stores the names it displayed in the 'dired_filenames' setting, so
+        they are normally read from there without touching the text at all.  Otherwise the text
+        is fetched with a single substr call and split here rather than calling substr for every
+        line, which is very slow for large directories.
+        """
+        if region.empty():
+            return []
+        names = self.view.settings().get('dired_filenames')
+        if names is not None and len(names) == self.filecount():
+            return names
+        return list(map(_name, self.view.substr(region).split('\n')))
+
+
+    def _filenames_and_lines(self):
+        """
+        Returns parallel lists of the filename lines in the view and the filenames on them.
+        """
+        region = self.fileregion()
+        if region.empty():
+            return [], []
+        return self.view.lines(region), self._filenames(region)
+
+
+    def _rows(self, region, base, count):
+        """
+        Returns the range of file indexes touched by region, clamped to the `count` files.  `base`
+        is the row of the first file.
+        """
+        start = max(self.view.rowcol(region.begin())[0] - base, 0)
+        end   = min(self.view.rowcol(region.end())[0] - base, count - 1)
+        return range(start, end + 1)
+
+
     def get_all(self):
         """
         Returns a list of all filenames in the view.
         """
-        return [ RE_FILE.match(self.view.substr(l)).group(1) for l in self.view.lines(self.fileregion()) ]
+        return [ name for name in self._filenames(self.fileregion()) if name is not None ]
 
 
     def get_selected(self):
         """
-        Returns a list of selected filenames.
+        Returns a list of selected filenames in the order they appear in the view.
         """
-        names = set()
         fileregion = self.fileregion()
+        filenames = self._filenames(fileregion)
+        if not filenames:
+            return []
+        base  = self.view.rowcol(fileregion.a)[0]
+        count = len(filenames)
+        rows  = self._rows
+        names = []
+        extend = names.extend
+        # Selections are sorted and don't overlap, but several can be on the same line, so only
+        # emit rows past the last one emitted.
+        done = 0
         for sel in self.view.sel():
-            lines = self.view.lines(sel)
-            for line in lines:
-                if fileregion.contains(line):
-                    text = self.view.substr(line)
-                    names.add(RE_FILE.match(text).group(1))
-        return sorted(list(names))
+            r = rows(sel, base, count)
+            start = max(r.start, done)
+            if start < r.stop:
+                extend(filenames[start:r.stop])
+                done = r.stop
+        return [ name for name in names if name is not None ]
 
     def get_marked(self):
-        lines = []
-        if self.filecount():
-            for region in self.view.get_regions('marked'):
-                lines.extend(self.view.lines(region))
-        return [ RE_FILE.match(self.view.substr(line)).group(1) for line in lines ]
+        """
+        Returns a list of marked filenames.
+        """
+        fileregion = self.fileregion()
+        filenames = self._filenames(fileregion)
+        if not filenames:
+            return []
+        # Each mark is a single file line, so its row is enough to find the filename.
+        rowcol = self.view.rowcol
+        base  = rowcol(fileregion.a)[0]
+        count = len(filenames)
+        names = []
+        append = names.append
+        for region in self.view.get_regions('marked'):
+            i = rowcol(region.a)[0] - base
+            if 0 <= i < count and filenames[i] is not None:
+                append(filenames[i])
+        return names
 
     def _mark(self, mark=None, regions=None):
         """
@@ -102,45 +219,59 @@ class DiredBaseCommand:
         # Allow the user to pass a single region or a collection (like view.sel()).
         if isinstance(regions, Region):
             regions = [ regions ]
+        if not regions:
+            return
+
+        view = self.view
+        previous = view.get_regions('marked')
+        if mark is False and not previous:
+            # Nothing to unmark.
+            return
 
-        filergn = self.fileregion()
+        lines, filenames = self._filenames_and_lines()
+        if not filenames:
+            return
+        rowcol = view.rowcol
+        base  = rowcol(lines[0].a)[0]
+        count = len(filenames)
 
         # We can't update regions for a key, only replace, so we need to record the existing
-        # marks.
-        previous = self.view.get_regions('marked')
-        marked = { RE_FILE.match(self.view.substr(r)).group(1): r for r in previous }
-
-        for region in regions:
-            for line in self.view.lines(region):
-                if filergn.contains(line):
-                    text = self.view.substr(line)
-                    filename = RE_FILE.match(text).group(1)
-
-                    if mark not in (True, False):
-                        newmark = mark(filename in marked, filename)
-                        assert newmark in (True, False), 'Invalid mark: {}'.format(newmark)
-                    else:
-                        newmark = mark
-
-                    if newmark:
-                        marked[filename] = line
-                    else:
-                        marked.pop(filename, None)
+        # marks.  They are keyed by file index so setting or clearing a mark doesn't need the
+        # filename at all.  Use the mapping from the last call if nothing has changed since.
+        stamp = (view.id(), view.change_count())
+        cache = self._marked_cache
+        if cache and cache[0] == stamp and cache[1] == previous:
+            marked = cache[2]
+        else:
+            marked = {}
+            for r in previous:
+                i = rowcol(r.a)[0] - base
+                if 0 <= i < count and filenames[i] is not None:
+                    marked[i] = r
+        self._marked_cache = None
+
+        # Decide how to mark once instead of on every line.
+        rows = self._rows
+        indexes = chain.from_iterable(rows(region, base, count) for region in regions)
+        if mark is True:
+            _mark_all_true(marked, indexes, lines, filenames)
+        elif mark is False:
+            _mark_all_false(marked, indexes)
+        else:
+            _mark_predicate(mark, marked, indexes, lines, filenames)
 
         if marked:
-            r = sorted(list(marked.values()), key=lambda region: region.a)
-            self.view.add_regions('marked', r, 'dired.marked', 'dot', 0)
+            r = [ marked[i] for i in sorted(marked) ]
+            view.add_regions('marked', r, 'dired.marked', 'dot', 0)
         else:
-            self.view.erase_regions('marked')
+            r = []
+            view.erase_regions('marked')
+        self._marked_cache = (stamp, r, marked)
 
 
     def set_help_text(self, edit, text):
         # There is only 1 help text area, but the scope selector will skip blank lines
         # so use the union of all of the regions.
         regions = self.view.find_by_selector('comment.dired.help')
-        region = regions[0]
-        for other in regions[1:]:
-            region = region.cover(other)
-        start = region.begin()
-        self.view.erase(edit, region)
-        self.view.insert(edit, start, text)
+        region = Region(min(r.begin() for r in regions), max(r.end() for r in regions))
+        self.view.replace(edit, region, text)
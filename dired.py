@@ -2,10 +2,13 @@
 import sublime
 from sublime import Region
 from sublime_plugin import WindowCommand, TextCommand
-import os, shutil, tempfile, re
+import os, shutil, re, threading, uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from os.path import basename, dirname, isdir, exists, join, isabs, normpath
 
-from .common import RE_FILE, DiredBaseCommand
+from .common import DiredBaseCommand
 from . import prompt
 from .show import show
 
@@ -46,11 +49,132 @@ RENAME_HELP = """\
  Ctrl+Escape = discard changes"""
 
 
+# The dired settings object, loaded on first use since the API isn't ready at import time.
+_settings = None
+
+def dired_settings():
+    global _settings
+    if _settings is None:
+        _settings = sublime.load_settings('dired.sublime-settings')
+    return _settings
+
 def reuse_view():
-    return sublime.load_settings('dired.sublime-settings').get('reuse_view', False)
+    return dired_settings().get('reuse_view', False)
 
 def omit_patterns():
-    return sublime.load_settings('dired.sublime-settings').get('omit_patterns', [])
+    return dired_settings().get('omit_patterns', [])
+
+
+# The omit patterns and the regexes compiled from them by omit_res.
+_omit_res = ((), ())
+
+def omit_res():
+    """
+    Returns a tuple with a compiled regex for each of the omit patterns.
+    """
+    global _omit_res
+    patterns = tuple(omit_patterns())
+    if patterns != _omit_res[0]:
+        _omit_res = (patterns, tuple(re.compile(p) for p in patterns))
+    return _omit_res[1]
+
+
+# Maps a directory to the ((mtime, size), entries) from its last scan, least recently used first.
+_scan_cache = OrderedDict()
+
+SCAN_CACHE_SIZE = 64
+
+def scan(path):
+    """
+    Returns a sorted tuple of (name, is_dir) for the entries in the directory.
+
+    The entries are cached until the directory's mtime or size changes, so refreshing an
+    unchanged directory only costs a single stat.  Commands that modify a directory also call
+    forget_scan since the mtime resolution of some filesystems is coarse.
+    """
+    key = normpath(path)
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _scan_cache.pop(key, None)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, _scan(key))
+    _scan_cache[key] = cached
+    while len(_scan_cache) > SCAN_CACHE_SIZE:
+        _scan_cache.popitem(last=False)
+    return cached[1]
+
+def forget_scan(path):
+    """
+    Removes the cached entries of a directory, if any.
+    """
+    _scan_cache.pop(normpath(path), None)
+
+def _scan(path):
+    """
+    Reads the sorted (name, is_dir) entries for scan.
+
+    os.scandir gets the type of most entries from the directory listing itself, so it avoids a
+    stat per entry.  It isn't available in Sublime Text 3's Python 3.3.
+    """
+    if hasattr(os, 'scandir'):
+        entries = [ (e.name, e.is_dir()) for e in os.scandir(path) ]
+    else:
+        entries = [ (name, isdir(join(path, name))) for name in os.listdir(path) ]
+    # Names are unique so sort on them alone, which compares strings directly instead of tuples.
+    entries.sort(key=itemgetter(0))
+    return tuple(entries)
+
+
+POOL_SIZE = 8
+
+# The normalized directories with a run_in_pool operation in progress.  This is kept in memory
+# rather than in view settings so it never outlives the operation (settings are saved with the
+# session) and covers every view of a directory.
+_busy = set()
+
+def run_in_pool(paths, func, items, on_done, message):
+    """
+    Calls `func(item)` for each item on a thread pool in the background, then calls `on_done`
+    on the main thread even if some calls failed.
+
+    Deleting and moving files mostly waits on the filesystem, so running them side by side hides
+    the latency of slow (e.g. network) filesystems and keeps the UI responsive.  The pool is run
+    from its own thread since Sublime's async thread is shared by every package.
+
+    The directories in `paths` are busy until `on_done` runs since their views still show the
+    old listing and marks until then.  Use is_busy to avoid starting another operation on them.
+    `message` is shown in the status bar meanwhile.
+    """
+    paths = [ normpath(path) for path in paths ]
+    _busy.update(paths)
+    sublime.status_message(message)
+
+    def _done():
+        _busy.difference_update(paths)
+        on_done()
+
+    def _work():
+        try:
+            with ThreadPoolExecutor(max_workers=POOL_SIZE) as pool:
+                # Iterate so the first exception is raised (and reported in the console).
+                for _ in pool.map(func, items):
+                    pass
+        finally:
+            sublime.set_timeout(_done, 0)
+
+    thread = threading.Thread(target=_work)
+    thread.daemon = True
+    thread.start()
+
+def is_busy(path):
+    """
+    Returns True, with a status message, if a run_in_pool operation is still running on the
+    directory.
+    """
+    if normpath(path) in _busy:
+        sublime.status_message('dired: still busy with the previous operation')
+        return True
+    return False
 
 
 class DiredCommand(WindowCommand):
@@ -87,46 +211,49 @@ class DiredRefreshCommand(TextCommand, DiredBaseCommand):
     """
     Populates or repopulates a dired view.
     """
-    def run(self, edit, goto=None):
+    def run(self, edit, goto=None, refresh=False):
         """
         goto
             Optional filename to put the cursor on.
+
+        refresh
+            If True, the directory is always re-read instead of using the scan cache.  The
+            cache can miss changes that keep the directory's mtime, e.g. on coarse-grained or
+            network filesystems.
         """
         path = self.path
-
-        names = os.listdir(path)
-        names.sort()
-        f = []
-        for name in names:
-            if self.is_omitted(name):
-                continue
-            if isdir(join(path, name)):
-                name += os.sep
-            f.append(name)
+        if refresh:
+            forget_scan(path)
+        pats = omit_res()
+        entries = scan(path)
+        # Filter one pattern per pass so each name costs a single match call per pattern.
+        for p in pats:
+            match = p.match
+            entries = [ e for e in entries if not match(e[0]) ]
+        f = [ (name + os.sep if is_dir else name) for (name, is_dir) in entries ]
 
         marked = set(self.get_marked())
 
-        text = [ path ]
-        text.append('')
-        text.extend(f)
-        text.append('')
-        text.append(NORMAL_HELP)
+        text = '\n'.join([ path, '' ] + f + [ '', NORMAL_HELP ])
 
         self.view.set_read_only(False)
 
-        self.view.erase(edit, Region(0, self.view.size()))
-        self.view.insert(edit, 0, '\n'.join(text))
+        self.view.replace(edit, Region(0, self.view.size()), text)
         self.view.set_syntax_file('Packages/dired/dired.tmLanguage')
         self.view.settings().set('dired_count', len(f))
+        self.view.settings().set('dired_filenames', f)
 
         if marked:
             # Even if we have the same filenames, they may have moved so we have to manually
-            # find them again.
+            # find them again.  We know the text we just inserted so compute the line regions
+            # from the name lengths instead of reading the view.  The files start after the
+            # path and a blank line.
             regions = []
-            for line in self.view.lines(self.fileregion()):
-                filename = RE_FILE.match(self.view.substr(line)).group(1)
-                if filename in marked:
-                    regions.append(line)
+            pt = len(path) + 2
+            for name in f:
+                if name in marked:
+                    regions.append(Region(pt, pt + len(name)))
+                pt += len(name) + 1
             self.view.add_regions('marked', regions, 'dired.marked', 'dot', 0)
         else:
             self.view.erase_regions('marked')
@@ -137,23 +264,20 @@ class DiredRefreshCommand(TextCommand, DiredBaseCommand):
         if f:
             pt = self.fileregion().a
             if goto:
-                if isdir(join(path, goto)) and not goto.endswith(os.sep):
-                    goto += os.sep
+                # Directories are listed with a trailing separator, which goto may not have.
                 try:
-                    line = f.index(goto) + 2
-                    pt = self.view.text_point(line, 0)
+                    i = f.index(goto)
                 except ValueError:
-                    pass
+                    try:
+                        i = f.index(goto + os.sep)
+                    except ValueError:
+                        i = None
+                if i is not None:
+                    pt = self.view.text_point(i + 2, 0)
 
             self.view.sel().clear()
             self.view.sel().add(Region(pt, pt))
 
-    def is_omitted(self, name):
-        for pattern in omit_patterns():
-            if re.match(pattern, name):
-                return True
-        return False
-
 
 class DiredNextLineCommand(TextCommand, DiredBaseCommand):
     def run(self, edit, forward=None):
@@ -166,15 +290,16 @@ class DiredSelect(TextCommand, DiredBaseCommand):
         filenames = self.get_selected()
 
         # If reuse view is turned on and the only item is a directory, refresh the existing view.
+        # Directories are displayed with a trailing separator, so there is no need to stat them.
         if not new_view and reuse_view():
-            if len(filenames) == 1 and isdir(join(path, filenames[0])):
+            if len(filenames) == 1 and filenames[0].endswith(os.sep):
                 fqn = join(path, filenames[0])
                 show(self.view.window(), fqn, view_id=self.view.id())
                 return
 
         for filename in filenames:
             fqn = join(path, filename)
-            if isdir(fqn):
+            if filename.endswith(os.sep):
                 show(self.view.window(), fqn, ignore_existing=new_view)
             else:
                 self.view.window().open_file(fqn)
@@ -183,6 +308,8 @@ class DiredSelect(TextCommand, DiredBaseCommand):
 class DiredCreateCommand(TextCommand, DiredBaseCommand):
     def run(self, edit, which=None):
         assert which in ('file', 'directory'), "which: " + which
+        if is_busy(self.path):
+            return
 
         # Is there a better way to do this?  Why isn't there some kind of context?  I assume
         # the command instance is global and really shouldn't have instance information.
@@ -210,6 +337,7 @@ class DiredCreateCommand(TextCommand, DiredBaseCommand):
         else:
             open(fqn, 'wb')
 
+        forget_scan(self.path)
         self.view.run_command('dired_refresh', {'goto': value})
 
 
@@ -279,6 +407,8 @@ class DiredMarkCommand(TextCommand, DiredBaseCommand):
 
 class DiredDeleteCommand(TextCommand, DiredBaseCommand):
     def run(self, edit):
+        if is_busy(self.path):
+            return
         files = self.get_marked() or self.get_selected()
         if files:
             # Yes, I know this is English.  Not sure how Sublime is translating.
@@ -287,23 +417,34 @@ class DiredDeleteCommand(TextCommand, DiredBaseCommand):
             else:
                 msg = "Delete {} items?".format(len(files))
             if sublime.ok_cancel_dialog(msg):
-                for filename in files:
-                    fqn = join(self.path, filename)
+                path = self.path
+
+                def _delete(filename):
+                    fqn = join(path, filename)
                     if isdir(fqn):
                         shutil.rmtree(fqn)
                     else:
                         os.remove(fqn)
-                self.view.run_command('dired_refresh')
+
+                def _done():
+                    forget_scan(path)
+                    # A refresh would throw away the edits of a rename started meanwhile.
+                    if not self.view.settings().get('dired_rename_mode'):
+                        self.view.run_command('dired_refresh')
+
+                run_in_pool([ path ], _delete, files, _done, 'dired: deleting {} items...'.format(len(files)))
 
 
 class DiredMoveCommand(TextCommand, DiredBaseCommand):
     def run(self, edit):
+        if is_busy(self.path):
+            return
         files = self.get_marked() or self.get_selected()
         if files:
             prompt.start('Move to:', self.view.window(), self.path, self._move)
 
     def _move(self, path):
-        if path == self.path:
+        if path == self.path or is_busy(self.path):
             return
 
         files = self.get_marked() or self.get_selected()
@@ -316,21 +457,48 @@ class DiredMoveCommand(TextCommand, DiredBaseCommand):
 
         # Move all items into the target directory.  If the target directory was also selected,
         # ignore it.
-        files = self.get_marked() or self.get_selected()
         path = normpath(path)
-        for filename in files:
-            fqn = normpath(join(self.path, filename))
+        if is_busy(path):
+            return
+
+        # Within a filesystem a move is just a rename, so skip shutil.move's extra checks and
+        # copy fallback.  It is still used if the rename fails so errors are reported the same.
+        source = self.path
+        same_fs = os.stat(source).st_dev == os.stat(path).st_dev
+
+        def _move(filename):
+            fqn = normpath(join(source, filename))
             if fqn != path:
+                dst = join(path, basename(fqn))
+                if same_fs and not exists(dst):
+                    try:
+                        os.rename(fqn, dst)
+                        return
+                    except OSError:
+                        pass
                 shutil.move(fqn, path)
-        self.view.run_command('dired_refresh')
+
+        def _done():
+            forget_scan(source)
+            forget_scan(path)
+            # A refresh would throw away the edits of a rename started meanwhile.
+            if not self.view.settings().get('dired_rename_mode'):
+                self.view.run_command('dired_refresh')
+
+        run_in_pool([ source, path ], _move, files, _done, 'dired: moving {} items...'.format(len(files)))
 
 
 class DiredRenameCommand(TextCommand, DiredBaseCommand):
     def run(self, edit):
+        if is_busy(self.path):
+            return
         if self.filecount():
             # Store the original filenames so we can compare later.
             self.view.settings().set('rename', self.get_all())
             self.view.settings().set('dired_rename_mode', True)
+            # The names are about to be edited, so the stored listing no longer matches the view.
+            # The next refresh stores it again.
+            self.view.settings().erase('dired_filenames')
             self.view.set_read_only(False)
             self.set_help_text(edit, RENAME_HELP)
 
@@ -365,11 +533,9 @@ class DiredRenameCommitCommand(TextCommand, DiredBaseCommand):
 
         # We marked the set of files with a region.  Make sure the region still has the same
         # number of files.
-        after = []
-
-        for region in self.view.get_regions('rename'):
-            for line in self.view.lines(region):
-                after.append(self.view.substr(line).strip())
+        after = [ line.strip()
+                  for region in self.view.get_regions('rename')
+                  for line in self.view.substr(region).split('\n') ]
 
         if len(after) != len(before):
             sublime.error_message('You cannot add or remove lines')
@@ -381,28 +547,40 @@ class DiredRenameCommitCommand(TextCommand, DiredBaseCommand):
 
         diffs = [ (b, a) for (b, a) in zip(before, after) if b != a ]
         if diffs:
-            existing = set(before)
-            while diffs:
-                b, a = diffs.pop(0)
-
-                if a in existing:
-                    # There is already a file with this name.  Give it a temporary name (in
-                    # case of cycles like "x->z and z->x") and put it back on the list.
-                    tmp = tempfile.NamedTemporaryFile(delete=False, dir=self.path).name
-                    os.unlink(tmp)
-                    diffs.append((tmp, a))
-                    a = tmp
-
-                print('dired rename: {} --> {}'.format(b, a))
-                os.rename(join(self.path, b), join(self.path, a))
-                existing.remove(b)
-                existing.add(a)
+            # A file can't be renamed until the file currently using its new name has been
+            # renamed, so first work back along each chain of renames from the ends whose new
+            # names are free.
+            pending = dict(diffs)
+            source_of = { a: b for (b, a) in diffs }
+            ready = deque(b for (b, a) in diffs if a not in pending)
+            while ready:
+                b = ready.popleft()
+                self._rename(b, pending.pop(b))
+                if b in source_of:
+                    ready.append(source_of[b])
+
+            # Whatever is left are cycles like "x->z and z->x".  Move one file of each cycle out
+            # of the way to a temporary name, which frees the rest of the cycle.
+            while pending:
+                start, target = pending.popitem()
+                tmp = '.dired_tmp_' + uuid.uuid4().hex
+                self._rename(start, tmp)
+                b = source_of[start]
+                while b != start:
+                    self._rename(b, pending.pop(b))
+                    b = source_of[b]
+                self._rename(tmp, target)
+            forget_scan(self.path)
 
         self.view.erase_regions('rename')
         self.view.settings().erase('rename')
         self.view.settings().set('dired_rename_mode', False)
         self.view.run_command('dired_refresh')
 
+    def _rename(self, b, a):
+        print('dired rename: {} --> {}'.format(b, a))
+        os.rename(join(self.path, b), join(self.path, a))
+
 
 class DiredUpCommand(TextCommand, DiredBaseCommand):
     def run(self, edit):
@@ -429,6 +607,29 @@ from sublime_plugin import EventListener
 from .common import first
 
 
+# Maps (window id, view id) to the preview views found by find_preview.  Entries are removed when
+# the view is closed.
+_preview_views = {}
+
+def find_preview(window, preview_id):
+    """
+    Returns the view with id `preview_id` in the window, or None.
+    """
+    key = (window.id(), preview_id)
+    view = _preview_views.get(key)
+    if view is not None:
+        # The view may have been moved to another window.
+        w = view.window()
+        if w is not None and w.id() == key[0]:
+            return view
+    view = first(window.views(), lambda v: v.id() == preview_id)
+    if view is not None:
+        _preview_views[key] = view
+    else:
+        _preview_views.pop(key, None)
+    return view
+
+
 def groups_on_preview(window) :
     """
     Retrun group number of dired(active) and preview.
@@ -453,7 +654,7 @@ class DiredPreviewCommand(TextCommand, DiredBaseCommand):
     def run(self, edit):
         window = self.view.window()
         preview_id = self.view.settings().get('preview_id')
-        preview_view = first(window.views(), lambda v: v.id() == preview_id)
+        preview_view = find_preview(window, preview_id)
 
         # Preview mode on.
         if not 'Preview: ' in self.view.name()[0:9] :
@@ -474,6 +675,7 @@ class DiredPreviewCommand(TextCommand, DiredBaseCommand):
                 path_list = get_path_list(self.path, self.get_selected(), False)
 
                 if path_list :
+                    self.view.settings().set('preview_path', path_list[0])
                     window.run_command('dired_preview_refresh', {'path':path_list[0]})
 
             # Preview mode off.
@@ -494,7 +696,7 @@ class DiredPreviewCloseCommand(TextCommand, DiredBaseCommand):
 
         # Get directory preview view.
         preview_id = self.view.settings().get('preview_id')
-        preview_view = first(window.views(), lambda v: v.id() == preview_id)
+        preview_view = find_preview(window, preview_id)
         window.focus_group(groups[1])
 
         # For image file preview.
@@ -518,16 +720,39 @@ class DiredPreviewCloseCommand(TextCommand, DiredBaseCommand):
 
 
 class DiredPreviewEventListener(EventListener, DiredBaseCommand):
+    def on_close(self, view):
+        view_id = view.id()
+        for key in [ key for key in _preview_views if key[1] == view_id ]:
+            del _preview_views[key]
+
     def on_selection_modified(self, view):
+        # This runs for every cursor movement in every view, so check the cheap setting before
+        # looking at scopes or selected files.
+        if not view.settings().get('preview_key'):
+            return
         self.view = view
         selections = self.view.sel()
         if selections and len(selections) > 0 and 'text.dired' in self.view.scope_name(selections[0].a):
-            if self.view.settings().get('preview_key'):
-                path_list = get_path_list(self.path, self.get_selected(), False)
-                if path_list:
-                    self.view.settings().set('preview_key', False)
-                    self.view.window().run_command('dired_preview_refresh', {'path':path_list[0]})
-                    self.view.settings().set('preview_key', True)
+            path_list = get_path_list(self.path, self.get_selected(), False)
+            # Moving within the same line shouldn't preview the same file again, unless its
+            # preview has been closed.
+            if path_list and not self._previewing(path_list[0]):
+                self.view.settings().set('preview_key', False)
+                self.view.settings().set('preview_path', path_list[0])
+                self.view.window().run_command('dired_preview_refresh', {'path':path_list[0]})
+                self.view.settings().set('preview_key', True)
+
+    def _previewing(self, path):
+        """
+        Returns True if `path` is the last path previewed and its preview is still open.
+        """
+        settings = self.view.settings()
+        if path != settings.get('preview_path'):
+            return False
+        window = self.view.window()
+        if path.endswith(os.sep):
+            return find_preview(window, settings.get('preview_id')) is not None
+        return window.find_open_file(path) is not None
 
 
 class DiredPreviewRefreshCommand(TextCommand, DiredBaseCommand):
@@ -538,7 +763,7 @@ class DiredPreviewRefreshCommand(TextCommand, DiredBaseCommand):
 
         # Get directory preview view.
         preview_id = self.view.settings().get('preview_id')
-        preview_view = first(window.views(), lambda v: v.id() == preview_id)
+        preview_view = find_preview(window, preview_id)
 
 
         if os.path.isfile(path):
@@ -564,7 +789,7 @@ class DiredPreviewRefreshCommand(TextCommand, DiredBaseCommand):
 
 
 def bookmarks():
-    return sublime.load_settings('dired.sublime-settings').get('bookmarks', [])
+    return dired_settings().get('bookmarks', [])
 
 
 def project(window) :
@@ -605,7 +830,7 @@ class DiredAddCommand(TextCommand, DiredBaseCommand):
 
         for i, lst in enumerate([selected_path, current_path]) :
             if not len(lst) == 0 :
-                qp_list.append([note[i], str(lst)[1:-1].replace('\'', '')])
+                qp_list.append([note[i], ', '.join(lst)])
                 path_list.append(lst)
 
         def on_done(select) :
@@ -648,27 +873,26 @@ class DiredRemoveFromProjectCommand(TextCommand, DiredBaseCommand):
 
 class DiredAddBookmarkCommand(TextCommand, DiredBaseCommand):
     def run(self, edit, dirs):
-        settings = sublime.load_settings('dired.sublime-settings')
+        settings = dired_settings()
 
         for key_name in ['reuse_view', 'bookmarks']:
             settings.set(key_name, settings.get(key_name))
 
         bm = bookmarks()
-        for path in dirs :
-            bm.append(path)
-            settings.set('bookmarks', bm)
+        bm.extend(dirs)
+        settings.set('bookmarks', bm)
 
-            # This command makes/writes a sublime-settings file at Packages/User/,
-            # and doesn't write into one at Packages/dired/.
-            sublime.save_settings('dired.sublime-settings')
+        # This command makes/writes a sublime-settings file at Packages/User/,
+        # and doesn't write into one at Packages/dired/.
+        sublime.save_settings('dired.sublime-settings')
 
-            sublime.status_message('Bookmarking succeeded.')
-            self.view.erase_regions('marked')
+        sublime.status_message('Bookmarking succeeded.')
+        self.view.erase_regions('marked')
 
 
 class DiredRemoveBookmarkCommand(TextCommand, DiredBaseCommand):
     def run(self, edit):
-        settings = sublime.load_settings('dired.sublime-settings')
+        settings = dired_settings()
 
         for key_name in ['reuse_view', 'bookmarks']:
             settings.set(key_name, settings.get(key_name))
@@ -703,30 +927,26 @@ class DiredGotoAnywhereCommand(TextCommand, DiredCommand):
         bm = bookmarks()
         pr = project(self.window)
 
-        qp_list = []
+        # (label, path) for each choice.  The path is None for the directory prompt.
+        entries = []
         if path and new_view :
-            qp_list.append('Current dir: ' + os.path.split(path)[0])
+            current = os.path.split(path)[0]
+            entries.append(('Current dir: ' + current, current))
         if home :
-            qp_list.append('Home: ' + home)
+            entries.append(('Home: ' + home, home))
         for item in bm :
-            qp_list.append('Bookmark: ' + item)
+            entries.append(('Bookmark: ' + item, item))
         for item in pr :
-            qp_list.append('Project: ' + item)
-        qp_list.append('Goto directory')
+            entries.append(('Project: ' + item, item))
+        entries.append(('Goto directory', None))
+        qp_list = [ label for (label, fqn) in entries ]
 
         def on_done(select):
             if not select == -1 :
-                fqn = qp_list[select]
-                if 'Current dir' in fqn :
-                    fqn = fqn[13:]
-                elif 'Home' in fqn :
-                    fqn = fqn[6:]
-                elif 'Bookmark' in fqn :
-                    fqn = fqn[10:]
-                elif 'Project' in fqn :
-                    fqn = fqn[9:]
-                elif 'Goto directory' in fqn :
+                fqn = entries[select][1]
+                if fqn is None :
                     prompt.start('Directory:', self.window, self._determine_path(), self._show)
+                    return
 
                 # If reuse view is turned on and the only item is a directory,
                 # refresh the existing view.
@@ -748,34 +968,23 @@ class DiredJumptoNameCommand(TextCommand, DiredBaseCommand):
     def run(self, view):
         path = self.path
         window = self.view.window()
-        names = os.listdir(path)
-        f = []
-        for name in names:
-            if isdir(join(path, name)):
-                name += os.sep
-            f.append(name)
+        # Offer the names already displayed (and stored by the refresh) rather than reading the
+        # directory again.  Their position in the list is their line in the view.
+        f = self.get_all()
 
         def on_done(select):
             if not select == -1 :
                 line_str = f[select]
-                r_list = self.view.find_all(line_str, sublime.LITERAL)
-
-                # Make match whole word.
-                if len(r_list) > 1 :
-                    for r in r_list :
-                        find_str = self.view.substr(self.view.line(r))
-                        if find_str == line_str :
-                            break
-                else :
-                    r = r_list[0]
+                pt = self.view.text_point(select + 2, 0)
 
                 if self.p_key :
+                    self.view.settings().set('preview_path', path + line_str)
                     window.run_command('dired_preview_refresh', {'path':path + line_str})
 
 
                 self.view.sel().clear()
-                self.view.sel().add(r.a)
-                self.view.show(r.a)
+                self.view.sel().add(pt)
+                self.view.show(pt)
 
                 if self.p_key :
                     self.view.settings().set('preview_key', True)